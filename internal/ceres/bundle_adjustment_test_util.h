@@ -32,6 +32,9 @@
 // the generated bundle adjustment test binaries. The reason to split the
 // bundle tests into separate binaries is so the tests can get parallelized.
 
+#ifndef CERES_INTERNAL_BUNDLE_ADJUSTMENT_TEST_UTIL_H_
+#define CERES_INTERNAL_BUNDLE_ADJUSTMENT_TEST_UTIL_H_
+
 #include <cmath>
 #include <cstdio>
 #include <cstdlib>
@@ -247,3 +250,5 @@ using BundleAdjustmentTest = SystemTest<BundleAdjustmentProblem>;
 
 }  // namespace internal
 }  // namespace ceres
+
+#endif  // CERES_INTERNAL_BUNDLE_ADJUSTMENT_TEST_UTIL_H_
@@ -33,6 +33,20 @@
 # tests take forever to run. Splitting them into separate binaries makes it
 # easier to parallelize in continuous integration systems, and makes local
 # processing on multi-core workstations much faster.
+#
+# The generated tests are checked in; see generate_template_specializations.py.
+
+import concurrent.futures
+import functools
+import itertools
+import os
+import string
+
+from generator_utils import OUTPUT_ROOT, write_if_changed
+
+# Directory into which the tests are generated.
+OUTPUT_DIRECTORY = os.path.join(OUTPUT_ROOT,
+                                'generated_bundle_adjustment_tests')
 
 # Product of ORDERINGS, THREAD_CONFIGS, and SOLVER_CONFIGS is the full set of
 # tests to generate.
@@ -71,6 +85,17 @@ ITERATIVE_SOLVER_CONFIGS = [
     ('ITERATIVE_SCHUR',        'ACCELERATE_SPARSE','CLUSTER_TRIDIAGONAL'),
 ]
 
+# All solver configurations as (linear solver, dense backend, sparse backend,
+# preconditioner) tuples, filling in the defaults for each family above.
+SOLVER_CONFIGS = (
+    [(linear_solver, dense_backend, 'NO_SPARSE', 'IDENTITY')
+     for linear_solver, dense_backend in DENSE_SOLVER_CONFIGS] +
+    [(linear_solver, 'EIGEN', sparse_backend, 'IDENTITY')
+     for linear_solver, sparse_backend in SPARSE_SOLVER_CONFIGS] +
+    [(linear_solver, 'EIGEN', sparse_backend, preconditioner)
+     for linear_solver, sparse_backend, preconditioner
+     in ITERATIVE_SOLVER_CONFIGS])
+
 FILENAME_SHORTENING_MAP = dict(
   DENSE_SCHUR='denseschur',
   ITERATIVE_SCHUR='iterschur',
@@ -93,6 +118,22 @@ FILENAME_SHORTENING_MAP = dict(
   kUserOrdering='user',
 )
 
+# Preprocessor (begin, end) guards for tests which need an optional backend.
+# Backends which are always available have no entry.
+SPARSE_BACKEND_GUARDS = dict(
+  SUITE_SPARSE=('#ifndef CERES_NO_SUITESPARSE',
+                '#endif  // CERES_NO_SUITESPARSE'),
+  ACCELERATE_SPARSE=('#ifndef CERES_NO_ACCELERATE_SPARSE',
+                     '#endif  // CERES_NO_ACCELERATE_SPARSE'),
+  EIGEN_SPARSE=('#ifdef CERES_USE_EIGEN_SPARSE',
+                '#endif  // CERES_USE_EIGEN_SPARSE'),
+)
+
+DENSE_BACKEND_GUARDS = dict(
+  LAPACK=('#ifndef CERES_NO_LAPACK', '#endif  // CERES_NO_LAPACK'),
+  CUDA=('#ifndef CERES_NO_CUDA', '#endif  // CERES_NO_CUDA'),
+)
+
 COPYRIGHT_HEADER = (
 """// Ceres Solver - A fast non-linear least squares minimizer
 // Copyright 2023 Google Inc. All rights reserved.
@@ -131,25 +172,26 @@ COPYRIGHT_HEADER = (
 //
 // This file is generated using generate_bundle_adjustment_tests.py.""")
 
-BUNDLE_ADJUSTMENT_TEST_TEMPLATE = (COPYRIGHT_HEADER + """
+# Compiled once at import time and substituted for every generated test.
+BUNDLE_ADJUSTMENT_TEST_TEMPLATE = string.Template(COPYRIGHT_HEADER + """
 
 #include "ceres/bundle_adjustment_test_util.h"
 #include "ceres/internal/config.h"
 #include "gtest/gtest.h"
-%(preprocessor_conditions_begin)s
+${preprocessor_conditions_begin}
 namespace ceres::internal {
 
 TEST_F(BundleAdjustmentTest,
-       %(test_class_name)s) {  // NOLINT
+       ${test_class_name}) {  // NOLINT
   BundleAdjustmentProblem bundle_adjustment_problem;
   Solver::Options* options = bundle_adjustment_problem.mutable_solver_options();
   options->eta = 0.01;
-  options->num_threads = %(num_threads)s;
-  options->linear_solver_type = %(linear_solver)s;
-  options->dense_linear_algebra_library_type = %(dense_backend)s;
-  options->sparse_linear_algebra_library_type = %(sparse_backend)s;
-  options->preconditioner_type = %(preconditioner)s;
-  if (%(ordering)s) {
+  options->num_threads = ${num_threads};
+  options->linear_solver_type = ${linear_solver};
+  options->dense_linear_algebra_library_type = ${dense_backend};
+  options->sparse_linear_algebra_library_type = ${sparse_backend};
+  options->preconditioner_type = ${preconditioner};
+  if (${ordering}) {
     options->linear_solver_ordering = nullptr;
   }
   Problem* problem = bundle_adjustment_problem.mutable_problem();
@@ -157,20 +199,63 @@ TEST_F(BundleAdjustmentTest,
 }
 
 }  // namespace ceres::internal
-%(preprocessor_conditions_end)s""")
+${preprocessor_conditions_end}""")
+
+# The unity test includes every generated test, so that they can be compiled as
+# a single binary when BUNDLE_ADJUSTMENT_UNITY_TEST is enabled in CMake. This
+# trades the parallelism of building (and running) the tests separately for
+# compiling the common headers only once.
+UNITY_TEST_FILENAME = 'ba_unity_test.cc'
+
+UNITY_TEST_HEADER = (COPYRIGHT_HEADER + """
+//
+// All of the generated bundle adjustment tests as a single translation unit.
 
+""")
+
+@functools.lru_cache(maxsize=None)
 def camelcasify(token):
   """Convert capitalized underscore tokens to camel case"""
   return ''.join([x.lower().capitalize() for x in token.split('_')])
 
 
+# The #ifdef/#ifndef stacks depend only on the backends in use, so they are
+# computed once per (sparse_backend, dense_backend) pair and reused.
+@functools.lru_cache(maxsize=None)
+def preprocessor_conditions(sparse_backend, dense_backend):
+  """Return the (begin, end) preprocessor guards for the given backends"""
+  # Accumulate appropriate #ifdef/#ifndefs for the solver's backends.
+  preprocessor_conditions_begin = []
+  preprocessor_conditions_end = []
+  for guard in (SPARSE_BACKEND_GUARDS.get(sparse_backend),
+                DENSE_BACKEND_GUARDS.get(dense_backend)):
+    if guard:
+      preprocessor_conditions_begin.append(guard[0])
+      preprocessor_conditions_end.append(guard[1])
+
+  # The #endifs close the guards in the reverse order they were opened.
+  preprocessor_conditions_end.reverse()
+
+  # If there are #ifdefs, put newlines around them.
+  if preprocessor_conditions_begin:
+    preprocessor_conditions_begin = ['', *preprocessor_conditions_begin, '']
+    preprocessor_conditions_end = ['', *preprocessor_conditions_end, '']
+
+  return ('\n'.join(preprocessor_conditions_begin),
+          '\n'.join(preprocessor_conditions_end))
+
+
 def generate_bundle_test(linear_solver,
                          dense_backend,
                          sparse_backend,
                          preconditioner,
                          ordering,
                          thread_config):
-  """Generate a bundle adjustment test executable configured appropriately"""
+  """Generate a bundle adjustment test executable configured appropriately.
+
+  Returns a (filename, contents) pair; the caller is responsible for writing
+  the contents out to disk.
+  """
 
   # Preconditioner only makes sense for iterative schur; drop it otherwise.
   preconditioner_tag = preconditioner
@@ -205,40 +290,12 @@ def generate_bundle_test(linear_solver,
           num_threads=thread_config,
           test_class_name=test_class_name)
 
-  # Accumulate appropriate #ifdef/#ifndefs for the solver's sparse backend.
-  preprocessor_conditions_begin = []
-  preprocessor_conditions_end = []
-  if sparse_backend == 'SUITE_SPARSE':
-    preprocessor_conditions_begin.append('#ifndef CERES_NO_SUITESPARSE')
-    preprocessor_conditions_end.insert(0, '#endif  // CERES_NO_SUITESPARSE')
-  elif sparse_backend == 'ACCELERATE_SPARSE':
-    preprocessor_conditions_begin.append('#ifndef CERES_NO_ACCELERATE_SPARSE')
-    preprocessor_conditions_end.insert(0, '#endif  // CERES_NO_ACCELERATE_SPARSE')
-  elif sparse_backend == 'EIGEN_SPARSE':
-    preprocessor_conditions_begin.append('#ifdef CERES_USE_EIGEN_SPARSE')
-    preprocessor_conditions_end.insert(0, '#endif  // CERES_USE_EIGEN_SPARSE')
-
-  if dense_backend == "LAPACK":
-    preprocessor_conditions_begin.append('#ifndef CERES_NO_LAPACK')
-    preprocessor_conditions_end.insert(0, '#endif  // CERES_NO_LAPACK')
-  elif dense_backend == "CUDA":
-    preprocessor_conditions_begin.append('#ifndef CERES_NO_CUDA')
-    preprocessor_conditions_end.insert(0, '#endif  // CERES_NO_CUDA')
-
-  # If there are #ifdefs, put newlines around them.
-  if preprocessor_conditions_begin:
-    preprocessor_conditions_begin.insert(0, '')
-    preprocessor_conditions_begin.append('')
-    preprocessor_conditions_end.insert(0, '')
-    preprocessor_conditions_end.append('')
-
   # Put #ifdef/#ifndef stacks into the template parameters.
-  template_parameters['preprocessor_conditions_begin'] = '\n'.join(
-      preprocessor_conditions_begin)
-  template_parameters['preprocessor_conditions_end'] = '\n'.join(
-      preprocessor_conditions_end)
+  (template_parameters['preprocessor_conditions_begin'],
+   template_parameters['preprocessor_conditions_end']) = (
+       preprocessor_conditions(sparse_backend, dense_backend))
 
-  # Substitute variables into the test template, and write the result to a file.
+  # Derive the output filename from the configuration.
   filename_tag = '_'.join(FILENAME_SHORTENING_MAP.get(x) for x in [
       linear_solver,
       dense_backend_tag,
@@ -250,56 +307,62 @@ def generate_bundle_test(linear_solver,
   if (thread_config == MULTI_THREADED):
     filename_tag += '_threads'
 
-  filename = ('generated_bundle_adjustment_tests/ba_%s_test.cc' %
-                filename_tag.lower())
-  with open(filename, 'w') as fd:
-    fd.write(BUNDLE_ADJUSTMENT_TEST_TEMPLATE % template_parameters)
+  filename = os.path.join(OUTPUT_DIRECTORY,
+                          f'ba_{filename_tag.lower()}_test.cc')
+
+  # Substitute variables into the test template.
+  return filename, BUNDLE_ADJUSTMENT_TEST_TEMPLATE.substitute(
+      template_parameters)
 
-  # All done.
-  print('Generated', filename)
 
-  return filename
+def write_file(generated_file):
+  """Write a (filename, contents) pair produced by generate_bundle_test"""
+  filename, contents = generated_file
+  return filename, write_if_changed(filename, contents)
 
 
 if __name__ == '__main__':
   # Iterate over all the possible configurations and generate the tests.
+  os.makedirs(OUTPUT_DIRECTORY, exist_ok=True)
   generated_files = []
 
-  for ordering in ORDERINGS:
-    for thread_config in THREAD_CONFIGS:
-      for linear_solver, dense_backend in DENSE_SOLVER_CONFIGS:
-        generated_files.append(
-            generate_bundle_test(linear_solver,
-                                 dense_backend,
-                                 'NO_SPARSE',
-                                 'IDENTITY',
-                                 ordering,
-                                 thread_config))
-
-      for linear_solver, sparse_backend, in SPARSE_SOLVER_CONFIGS:
-        generated_files.append(
-            generate_bundle_test(linear_solver,
-                                 'EIGEN',
-                                 sparse_backend,
-                                 'IDENTITY',
-                                 ordering,
-                                 thread_config))
-
-      for linear_solver, sparse_backend, preconditioner, in ITERATIVE_SOLVER_CONFIGS:
-        generated_files.append(
-            generate_bundle_test(linear_solver,
-                                 'EIGEN',
-                                 sparse_backend,
-                                 preconditioner,
-                                 ordering,
-                                 thread_config))
-
+  for ordering, thread_config, solver_config in itertools.product(
+      ORDERINGS, THREAD_CONFIGS, SOLVER_CONFIGS):
+    linear_solver, dense_backend, sparse_backend, preconditioner = solver_config
+    generated_files.append(
+        generate_bundle_test(linear_solver,
+                             dense_backend,
+                             sparse_backend,
+                             preconditioner,
+                             ordering,
+                             thread_config))
+
+  # The generated files are independent of each other, so overlap the file
+  # I/O rather than paying for each open/write/close in turn.
+  with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+    for filename, written in executor.map(write_file, generated_files):
+      print('Generated' if written else 'Unchanged', filename)
+
+  # Generate a unity test which compiles all of the tests above as a single
+  # translation unit.
+  unity_test = [UNITY_TEST_HEADER]
+  for filename, _ in generated_files:
+    unity_test.append(f'#include "{os.path.basename(filename)}"\n')
+  write_if_changed(os.path.join(OUTPUT_DIRECTORY, UNITY_TEST_FILENAME),
+                   ''.join(unity_test))
 
   # Generate the CMakeLists.txt as well.
-  with open('generated_bundle_adjustment_tests/CMakeLists.txt', 'w') as fd:
-    fd.write(COPYRIGHT_HEADER.replace('//', '#').replace('http:#', 'http://'))
-    fd.write('\n')
-    fd.write('\n')
-    for generated_file in generated_files:
-      fd.write('ceres_test(%s)\n' %
-               generated_file.split('/')[1].replace('_test.cc', ''))
+  cmake_lists = [
+      COPYRIGHT_HEADER.replace('//', '#').replace('http:#', 'http://'),
+      '\n',
+      '\n',
+      'if (BUNDLE_ADJUSTMENT_UNITY_TEST)\n',
+      f'  ceres_test({UNITY_TEST_FILENAME.replace("_test.cc", "")})\n',
+      'else (BUNDLE_ADJUSTMENT_UNITY_TEST)\n',
+  ]
+  for filename, _ in generated_files:
+    test_name = os.path.basename(filename).replace('_test.cc', '')
+    cmake_lists.append(f'  ceres_test({test_name})\n')
+  cmake_lists.append('endif (BUNDLE_ADJUSTMENT_UNITY_TEST)\n')
+  write_if_changed(os.path.join(OUTPUT_DIRECTORY, 'CMakeLists.txt'),
+                   ''.join(cmake_lists))
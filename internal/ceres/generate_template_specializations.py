@@ -50,6 +50,17 @@
 # that contains a function which can be queried to determine what
 # template specializations are available.
 #
+# The generated files are checked into the repository and consumed directly
+# by both the CMake and Bazel builds, neither of which runs this script. It
+# only needs to be re-run (from this directory) after SPECIALIZATIONS or one
+# of the *_template.py files is changed; files whose contents are unchanged
+# are not rewritten.
+#
+# With --amalgamate, all the specializations other than _d_d_d are instead
+# written to a single schur_eliminator_specializations.cc and
+# partitioned_matrix_view_specializations.cc respectively. This trades build
+# parallelism for parsing the (large) implementation headers only once.
+#
 # The following list of tuples, specializations indicates the set of
 # specializations that is generated.
 SPECIALIZATIONS = [(2, 2, 2),
@@ -76,27 +87,39 @@ SPECIALIZATIONS = [(2, 2, 2),
 
 import schur_eliminator_template
 import partitioned_matrix_view_template
+import argparse
 import os
 import glob
+import io
+import multiprocessing
+
+from generator_utils import OUTPUT_ROOT, write_if_changed
+
+# The factory and query files are generated into OUTPUT_ROOT itself, and the
+# specializations into its generated/ subdirectory.
+GENERATED_DIRECTORY = os.path.join(OUTPUT_ROOT, "generated")
 
-def SuffixForSize(size):
-  if size == "Eigen::Dynamic":
-    return "d"
-  return str(size)
+# Filename suffix for every block size that appears in SPECIALIZATIONS, plus
+# the fully dynamic specialization which is always generated.
+SIZE_SUFFIXES = {size: str(size)
+                 for sizes in SPECIALIZATIONS
+                 for size in sizes}
+SIZE_SUFFIXES["Eigen::Dynamic"] = "d"
 
 def SpecializationFilename(prefix, row_block_size, e_block_size, f_block_size):
-  return "_".join([prefix] + list(map(SuffixForSize, (row_block_size,
-                                                 e_block_size,
-                                                 f_block_size))))
+  return "_".join([prefix,
+                   SIZE_SUFFIXES[row_block_size],
+                   SIZE_SUFFIXES[e_block_size],
+                   SIZE_SUFFIXES[f_block_size]])
 
 def GenerateFactoryConditional(row_block_size, e_block_size, f_block_size):
   conditionals = []
   if (row_block_size != "Eigen::Dynamic"):
-    conditionals.append("(options.row_block_size == %s)" % row_block_size)
+    conditionals.append(f"(options.row_block_size == {row_block_size})")
   if (e_block_size != "Eigen::Dynamic"):
-    conditionals.append("(options.e_block_size == %s)" % e_block_size)
+    conditionals.append(f"(options.e_block_size == {e_block_size})")
   if (f_block_size != "Eigen::Dynamic"):
-    conditionals.append("(options.f_block_size == %s)" % f_block_size)
+    conditionals.append(f"(options.f_block_size == {f_block_size})")
   if (len(conditionals) == 0):
     return "%s"
 
@@ -105,43 +128,138 @@ def GenerateFactoryConditional(row_block_size, e_block_size, f_block_size):
 
   return "  if (" + " &&\n     ".join(conditionals) + ") {\n  %s\n  }\n"
 
-def Specialize(name, data):
+# The conditionals only depend on the specialization, so build them once up
+# front for the query file.
+FACTORY_CONDITIONALS = {
+    sizes: GenerateFactoryConditional(*sizes) for sizes in SPECIALIZATIONS
+}
+
+# The factories pack the block sizes into a single key (see SchurTemplateKey in
+# schur_templates.h) and dispatch on it with a switch statement, trying the
+# exact block sizes first and then falling back to dynamic f and e block sizes.
+FACTORY_SWITCH_HEADER = """  // Look for the most specific specialization first, then for one with a
+  // dynamic f_block_size, and finally for one with dynamic e and f block
+  // sizes.
+  for (const uint32_t key : {SchurTemplateKey(options.row_block_size,
+                                              options.e_block_size,
+                                              options.f_block_size),
+                             SchurTemplateKey(options.row_block_size,
+                                              options.e_block_size,
+                                              Eigen::Dynamic),
+                             SchurTemplateKey(options.row_block_size,
+                                              Eigen::Dynamic,
+                                              Eigen::Dynamic)}) {
+    switch (key) {
+"""
+
+FACTORY_CASE = """      case SchurTemplateKey(%s, %s, %s):
+%s
+"""
+
+FACTORY_SWITCH_FOOTER = """      default:
+        break;
+    }
+  }
+"""
+
+def Subsumes(general, specific):
+  """
+  True if every block size in general is either dynamic or equal to the
+  corresponding block size in specific.
+  """
+  return all(g == "Eigen::Dynamic" or g == s
+             for g, s in zip(general, specific))
+
+def CheckSpecializations():
+  """
+  The switch based factories pick the most specific matching specialization,
+  whereas the if-chain in the query file picks the first matching one. Check
+  that SPECIALIZATIONS is laid out such that both agree, and that every
+  specialization can be reached through the fallbacks in
+  FACTORY_SWITCH_HEADER.
+  """
+  for i, sizes in enumerate(SPECIALIZATIONS):
+    dynamic = tuple(size == "Eigen::Dynamic" for size in sizes)
+    if dynamic not in ((False, False, False),
+                       (False, False, True),
+                       (False, True, True)):
+      raise ValueError(f"Unsupported specialization {sizes}: only the "
+                       "trailing block sizes may be dynamic.")
+    for size in sizes:
+      if size != "Eigen::Dynamic" and not 0 < size < 0xFF:
+        raise ValueError(f"Unsupported block size {size} in {sizes}.")
+    for earlier in SPECIALIZATIONS[:i]:
+      if Subsumes(earlier, sizes):
+        raise ValueError(f"Specialization {sizes} is shadowed by {earlier}.")
+
+def WriteSpecializationFile(job):
+  """
+  Write a single specialization file. This is run in a worker process, so
+  it only takes picklable arguments.
+  """
+  output, header, template, sizes = job
+  write_if_changed(output, header + template % sizes)
+  return output
+
+def Specialize(name, data, pool, amalgamate=False):
   """
   Generate specialization code and the conditionals to instantiate it.
+
+  The specialization files are independent of each other and are written in
+  parallel using pool; the factory is written once they are all done. If
+  amalgamate is true, all specializations except for the fully dynamic one
+  are written to a single file instead.
+
+  Returns the list of specialization files.
   """
 
+  prefix = os.path.join(GENERATED_DIRECTORY, name)
+
   # Specialization files
-  for row_block_size, e_block_size, f_block_size in SPECIALIZATIONS:
-      output = SpecializationFilename("generated/" + name,
+  jobs = []
+  if amalgamate:
+    instantiations = "".join(data["AMALGAMATED_INSTANTIATION"] % sizes
+                             for sizes in SPECIALIZATIONS)
+    jobs.append((f"{prefix}_specializations.cc",
+                 data["HEADER"],
+                 data["AMALGAMATED_FILE"],
+                 (instantiations,)))
+  else:
+    for row_block_size, e_block_size, f_block_size in SPECIALIZATIONS:
+      output = SpecializationFilename(prefix,
                                       row_block_size,
                                       e_block_size,
                                       f_block_size) + ".cc"
-
-      with open(output, "w") as f:
-        f.write(data["HEADER"])
-        f.write(data["SPECIALIZATION_FILE"] %
-                  (row_block_size, e_block_size, f_block_size))
+      jobs.append((output,
+                   data["HEADER"],
+                   data["SPECIALIZATION_FILE"],
+                   (row_block_size, e_block_size, f_block_size)))
 
   # Generate the _d_d_d specialization.
-  output = SpecializationFilename("generated/" + name,
+  output = SpecializationFilename(prefix,
                                    "Eigen::Dynamic",
                                    "Eigen::Dynamic",
                                    "Eigen::Dynamic") + ".cc"
-  with open(output, "w") as f:
-    f.write(data["HEADER"])
-    f.write(data["DYNAMIC_FILE"] %
-              ("Eigen::Dynamic", "Eigen::Dynamic", "Eigen::Dynamic"))
+  jobs.append((output,
+               data["HEADER"],
+               data["DYNAMIC_FILE"],
+               ("Eigen::Dynamic", "Eigen::Dynamic", "Eigen::Dynamic")))
+
+  outputs = pool.map(WriteSpecializationFile, jobs)
 
   # Factory
-  with open(name + ".cc", "w") as f:
-    f.write(data["HEADER"])
-    f.write(data["FACTORY_FILE_HEADER"])
-    for row_block_size, e_block_size, f_block_size in SPECIALIZATIONS:
-        factory_conditional = GenerateFactoryConditional(
-            row_block_size, e_block_size, f_block_size)
-        factory = data["FACTORY"] % (row_block_size, e_block_size, f_block_size)
-        f.write(factory_conditional % factory);
-    f.write(data["FACTORY_FOOTER"])
+  f = io.StringIO()
+  f.write(data["HEADER"])
+  f.write(data["FACTORY_FILE_HEADER"])
+  f.write(FACTORY_SWITCH_HEADER)
+  for sizes in SPECIALIZATIONS:
+      factory = data["FACTORY"] % sizes
+      f.write(FACTORY_CASE % (*sizes, factory))
+  f.write(FACTORY_SWITCH_FOOTER)
+  f.write(data["FACTORY_FOOTER"])
+  write_if_changed(os.path.join(OUTPUT_ROOT, f"{name}.cc"), f.getvalue())
+
+  return outputs
 
 QUERY_HEADER = """// Ceres Solver - A fast non-linear least squares minimizer
 // Copyright 2023 Google Inc. All rights reserved.
@@ -224,23 +342,43 @@ def GenerateQueryFile():
   Generate file that allows querying for available template specializations.
   """
 
-  with open("schur_templates.cc", "w") as f:
-    f.write(QUERY_HEADER)
-    f.write(QUERY_FILE_HEADER)
-    for row_block_size, e_block_size, f_block_size in SPECIALIZATIONS:
-      factory_conditional = GenerateFactoryConditional(
-        row_block_size, e_block_size, f_block_size)
-      action = QUERY_ACTION % (row_block_size, e_block_size, f_block_size)
-      f.write(factory_conditional % action)
-    f.write(QUERY_FOOTER)
+  f = io.StringIO()
+  f.write(QUERY_HEADER)
+  f.write(QUERY_FILE_HEADER)
+  for sizes in SPECIALIZATIONS:
+    action = QUERY_ACTION % sizes
+    f.write(FACTORY_CONDITIONALS[sizes] % action)
+  f.write(QUERY_FOOTER)
+  write_if_changed(os.path.join(OUTPUT_ROOT, "schur_templates.cc"),
+                   f.getvalue())
 
 
 if __name__ == "__main__":
-  for f in glob.glob("generated/*"):
-    os.remove(f)
+  parser = argparse.ArgumentParser(
+      description="Generate the SchurEliminator and PartitionedMatrixView "
+                  "template specializations.")
+  parser.add_argument("--amalgamate", action="store_true",
+                      help="Write all the fixed size specializations of each "
+                           "class to a single file rather than one file per "
+                           "specialization.")
+  args = parser.parse_args()
 
-  Specialize("schur_eliminator",
-               schur_eliminator_template.__dict__)
-  Specialize("partitioned_matrix_view",
-               partitioned_matrix_view_template.__dict__)
+  CheckSpecializations()
+  os.makedirs(GENERATED_DIRECTORY, exist_ok=True)
+
+  with multiprocessing.Pool(processes=os.cpu_count()) as pool:
+    outputs = Specialize("schur_eliminator",
+                         schur_eliminator_template.__dict__,
+                         pool,
+                         args.amalgamate)
+    outputs += Specialize("partitioned_matrix_view",
+                          partitioned_matrix_view_template.__dict__,
+                          pool,
+                          args.amalgamate)
   GenerateQueryFile()
+
+  # Remove specializations which are no longer generated. Files which are
+  # still generated are only rewritten when their contents change.
+  for f in glob.glob(os.path.join(GENERATED_DIRECTORY, "*")):
+    if f not in outputs:
+      os.remove(f)
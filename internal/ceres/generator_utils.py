@@ -0,0 +1,61 @@
+# Ceres Solver - A fast non-linear least squares minimizer
+# Copyright 2023 Google Inc. All rights reserved.
+# http://ceres-solver.org/
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of Google Inc. nor the names of its contributors may be
+#   used to endorse or promote products derived from this software without
+#   specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# Helpers shared by generate_bundle_adjustment_tests.py and
+# generate_template_specializations.py.
+
+import os
+
+# Root directory into which the generated files are written. By default this is
+# the current directory, i.e. internal/ceres, but it can be overridden with the
+# CERES_GEN_OUTPUT_DIR environment variable, e.g. to generate into a scratch or
+# in-memory file system. The layout underneath the root is the same as in the
+# source tree.
+OUTPUT_ROOT = os.environ.get('CERES_GEN_OUTPUT_DIR', '')
+
+def write_if_changed(filename, contents):
+  """Write contents to filename, unless the file already holds exactly that.
+
+  Leaving unchanged files alone preserves their mtime, so the build system does
+  not recompile them. Changed files are written to a temporary file first and
+  then moved into place, so readers never see a partially written file.
+
+  Returns True if the file was written.
+  """
+  try:
+    with open(filename, 'r') as fd:
+      if fd.read() == contents:
+        return False
+  except FileNotFoundError:
+    pass
+
+  temporary_filename = filename + '.tmp'
+  with open(temporary_filename, 'w') as fd:
+    fd.write(contents)
+  os.replace(temporary_filename, filename)
+  return True
@@ -39,10 +39,12 @@
 //
 // This file is generated using generate_template_specializations.py.
 
+#include <cstdint>
 #include <memory>
 
 #include "ceres/linear_solver.h"
 #include "ceres/partitioned_matrix_view.h"
+#include "ceres/schur_templates.h"
 
 namespace ceres::internal {
 
@@ -51,125 +53,85 @@ PartitionedMatrixViewBase::~PartitionedMatrixViewBase() = default;
 std::unique_ptr<PartitionedMatrixViewBase> PartitionedMatrixViewBase::Create(
     const LinearSolver::Options& options, const BlockSparseMatrix& matrix) {
 #ifndef CERES_RESTRICT_SCHUR_SPECIALIZATION
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 2) &&
-     (options.f_block_size == 2)) {
-    return std::make_unique<PartitionedMatrixView<2,2, 2>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 2) &&
-     (options.f_block_size == 3)) {
-    return std::make_unique<PartitionedMatrixView<2,2, 3>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 2) &&
-     (options.f_block_size == 4)) {
-    return std::make_unique<PartitionedMatrixView<2,2, 4>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 2)) {
-    return std::make_unique<PartitionedMatrixView<2,2, Eigen::Dynamic>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 3) &&
-     (options.f_block_size == 3)) {
-    return std::make_unique<PartitionedMatrixView<2,3, 3>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 3) &&
-     (options.f_block_size == 4)) {
-    return std::make_unique<PartitionedMatrixView<2,3, 4>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 3) &&
-     (options.f_block_size == 6)) {
-    return std::make_unique<PartitionedMatrixView<2,3, 6>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 3) &&
-     (options.f_block_size == 9)) {
-    return std::make_unique<PartitionedMatrixView<2,3, 9>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 3)) {
-    return std::make_unique<PartitionedMatrixView<2,3, Eigen::Dynamic>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 4) &&
-     (options.f_block_size == 3)) {
-    return std::make_unique<PartitionedMatrixView<2,4, 3>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 4) &&
-     (options.f_block_size == 4)) {
-    return std::make_unique<PartitionedMatrixView<2,4, 4>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 4) &&
-     (options.f_block_size == 6)) {
-    return std::make_unique<PartitionedMatrixView<2,4, 6>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 4) &&
-     (options.f_block_size == 8)) {
-    return std::make_unique<PartitionedMatrixView<2,4, 8>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 4) &&
-     (options.f_block_size == 9)) {
-    return std::make_unique<PartitionedMatrixView<2,4, 9>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 2) &&
-     (options.e_block_size == 4)) {
-    return std::make_unique<PartitionedMatrixView<2,4, Eigen::Dynamic>>(
-                   options, matrix);
-  }
-  if (options.row_block_size == 2) {
-    return std::make_unique<PartitionedMatrixView<2,Eigen::Dynamic, Eigen::Dynamic>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 3) &&
-     (options.e_block_size == 3) &&
-     (options.f_block_size == 3)) {
-    return std::make_unique<PartitionedMatrixView<3,3, 3>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 4) &&
-     (options.e_block_size == 4) &&
-     (options.f_block_size == 2)) {
-    return std::make_unique<PartitionedMatrixView<4,4, 2>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 4) &&
-     (options.e_block_size == 4) &&
-     (options.f_block_size == 3)) {
-    return std::make_unique<PartitionedMatrixView<4,4, 3>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 4) &&
-     (options.e_block_size == 4) &&
-     (options.f_block_size == 4)) {
-    return std::make_unique<PartitionedMatrixView<4,4, 4>>(
-                   options, matrix);
-  }
-  if ((options.row_block_size == 4) &&
-     (options.e_block_size == 4)) {
-    return std::make_unique<PartitionedMatrixView<4,4, Eigen::Dynamic>>(
-                   options, matrix);
+  // Look for the most specific specialization first, then for one with a
+  // dynamic f_block_size, and finally for one with dynamic e and f block
+  // sizes.
+  for (const uint32_t key : {SchurTemplateKey(options.row_block_size,
+                                              options.e_block_size,
+                                              options.f_block_size),
+                             SchurTemplateKey(options.row_block_size,
+                                              options.e_block_size,
+                                              Eigen::Dynamic),
+                             SchurTemplateKey(options.row_block_size,
+                                              Eigen::Dynamic,
+                                              Eigen::Dynamic)}) {
+    switch (key) {
+      case SchurTemplateKey(2, 2, 2):
+        return std::make_unique<PartitionedMatrixView<2, 2, 2>>(
+            options, matrix);
+      case SchurTemplateKey(2, 2, 3):
+        return std::make_unique<PartitionedMatrixView<2, 2, 3>>(
+            options, matrix);
+      case SchurTemplateKey(2, 2, 4):
+        return std::make_unique<PartitionedMatrixView<2, 2, 4>>(
+            options, matrix);
+      case SchurTemplateKey(2, 2, Eigen::Dynamic):
+        return std::make_unique<PartitionedMatrixView<2, 2, Eigen::Dynamic>>(
+            options, matrix);
+      case SchurTemplateKey(2, 3, 3):
+        return std::make_unique<PartitionedMatrixView<2, 3, 3>>(
+            options, matrix);
+      case SchurTemplateKey(2, 3, 4):
+        return std::make_unique<PartitionedMatrixView<2, 3, 4>>(
+            options, matrix);
+      case SchurTemplateKey(2, 3, 6):
+        return std::make_unique<PartitionedMatrixView<2, 3, 6>>(
+            options, matrix);
+      case SchurTemplateKey(2, 3, 9):
+        return std::make_unique<PartitionedMatrixView<2, 3, 9>>(
+            options, matrix);
+      case SchurTemplateKey(2, 3, Eigen::Dynamic):
+        return std::make_unique<PartitionedMatrixView<2, 3, Eigen::Dynamic>>(
+            options, matrix);
+      case SchurTemplateKey(2, 4, 3):
+        return std::make_unique<PartitionedMatrixView<2, 4, 3>>(
+            options, matrix);
+      case SchurTemplateKey(2, 4, 4):
+        return std::make_unique<PartitionedMatrixView<2, 4, 4>>(
+            options, matrix);
+      case SchurTemplateKey(2, 4, 6):
+        return std::make_unique<PartitionedMatrixView<2, 4, 6>>(
+            options, matrix);
+      case SchurTemplateKey(2, 4, 8):
+        return std::make_unique<PartitionedMatrixView<2, 4, 8>>(
+            options, matrix);
+      case SchurTemplateKey(2, 4, 9):
+        return std::make_unique<PartitionedMatrixView<2, 4, 9>>(
+            options, matrix);
+      case SchurTemplateKey(2, 4, Eigen::Dynamic):
+        return std::make_unique<PartitionedMatrixView<2, 4, Eigen::Dynamic>>(
+            options, matrix);
+      case SchurTemplateKey(2, Eigen::Dynamic, Eigen::Dynamic):
+        return std::make_unique<PartitionedMatrixView<2, Eigen::Dynamic, Eigen::Dynamic>>(
+            options, matrix);
+      case SchurTemplateKey(3, 3, 3):
+        return std::make_unique<PartitionedMatrixView<3, 3, 3>>(
+            options, matrix);
+      case SchurTemplateKey(4, 4, 2):
+        return std::make_unique<PartitionedMatrixView<4, 4, 2>>(
+            options, matrix);
+      case SchurTemplateKey(4, 4, 3):
+        return std::make_unique<PartitionedMatrixView<4, 4, 3>>(
+            options, matrix);
+      case SchurTemplateKey(4, 4, 4):
+        return std::make_unique<PartitionedMatrixView<4, 4, 4>>(
+            options, matrix);
+      case SchurTemplateKey(4, 4, Eigen::Dynamic):
+        return std::make_unique<PartitionedMatrixView<4, 4, Eigen::Dynamic>>(
+            options, matrix);
+      default:
+        break;
+    }
   }
 
 #endif
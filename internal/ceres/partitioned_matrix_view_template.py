@@ -117,11 +117,34 @@ template class PartitionedMatrixView<%s, %s, %s>;
 #endif  // CERES_RESTRICT_SCHUR_SPECIALIZATION
 """
 
+# Used instead of SPECIALIZATION_FILE when all the specializations are
+# generated into a single file.
+AMALGAMATED_FILE = """
+// This include must come before any #ifndef check on Ceres compile options.
+#include "ceres/internal/config.h"
+
+#ifndef CERES_RESTRICT_SCHUR_SPECIALIZATION
+
+#include "ceres/partitioned_matrix_view_impl.h"
+
+namespace ceres::internal {
+
+%s
+}  // namespace ceres::internal
+
+#endif  // CERES_RESTRICT_SCHUR_SPECIALIZATION
+"""
+
+AMALGAMATED_INSTANTIATION = """template class PartitionedMatrixView<%s, %s, %s>;
+"""
+
 FACTORY_FILE_HEADER = """
+#include <cstdint>
 #include <memory>
 
 #include "ceres/linear_solver.h"
 #include "ceres/partitioned_matrix_view.h"
+#include "ceres/schur_templates.h"
 
 namespace ceres::internal {
 
@@ -131,8 +154,8 @@ std::unique_ptr<PartitionedMatrixViewBase> PartitionedMatrixViewBase::Create(
     const LinearSolver::Options& options, const BlockSparseMatrix& matrix) {
 #ifndef CERES_RESTRICT_SCHUR_SPECIALIZATION
 """
-FACTORY = """  return std::make_unique<PartitionedMatrixView<%s,%s, %s>>(
-                   options, matrix);"""
+FACTORY = """        return std::make_unique<PartitionedMatrixView<%s, %s, %s>>(
+            options, matrix);"""
 
 FACTORY_FOOTER = """
 #endif
@@ -119,11 +119,34 @@ template class SchurEliminator<%s, %s, %s>;
 #endif  // CERES_RESTRICT_SCHUR_SPECIALIZATION
 """
 
+# Used instead of SPECIALIZATION_FILE when all the specializations are
+# generated into a single file.
+AMALGAMATED_FILE = """
+// This include must come before any #ifndef check on Ceres compile options.
+#include "ceres/internal/config.h"
+
+#ifndef CERES_RESTRICT_SCHUR_SPECIALIZATION
+
+#include "ceres/schur_eliminator_impl.h"
+
+namespace ceres::internal {
+
+%s
+}  // namespace ceres::internal
+
+#endif  // CERES_RESTRICT_SCHUR_SPECIALIZATION
+"""
+
+AMALGAMATED_INSTANTIATION = """template class SchurEliminator<%s, %s, %s>;
+"""
+
 FACTORY_FILE_HEADER = """
+#include <cstdint>
 #include <memory>
 
 #include "ceres/linear_solver.h"
 #include "ceres/schur_eliminator.h"
+#include "ceres/schur_templates.h"
 
 namespace ceres::internal {
 
@@ -134,7 +157,7 @@ std::unique_ptr<SchurEliminatorBase> SchurEliminatorBase::Create(
 #ifndef CERES_RESTRICT_SCHUR_SPECIALIZATION
 """
 
-FACTORY = """  return std::make_unique<SchurEliminator<%s, %s, %s>>(options);"""
+FACTORY = """        return std::make_unique<SchurEliminator<%s, %s, %s>>(options);"""
 
 FACTORY_FOOTER = """
 #endif
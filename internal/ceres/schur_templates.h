@@ -32,12 +32,34 @@
 #ifndef CERES_INTERNAL_SCHUR_TEMPLATES_H_
 #define CERES_INTERNAL_SCHUR_TEMPLATES_H_
 
+#include <cstdint>
+
 #include "ceres/internal/config.h"
 #include "ceres/internal/export.h"
 #include "ceres/linear_solver.h"
 
 namespace ceres::internal {
 
+// Packs a single block size into eight bits. Sizes which do not fit, as well
+// as Eigen::Dynamic, are all mapped to the same value, since only a
+// specialization which is dynamic in that dimension can be used for them.
+constexpr uint32_t PackSchurBlockSize(int block_size) {
+  return (block_size > 0 && block_size < 0xFF)
+             ? static_cast<uint32_t>(block_size)
+             : 0xFF;
+}
+
+// Packs the block sizes of a Schur template specialization into a single
+// integer, so that the generated factories can dispatch on them with a switch
+// statement.
+constexpr uint32_t SchurTemplateKey(int row_block_size,
+                                    int e_block_size,
+                                    int f_block_size) {
+  return (PackSchurBlockSize(row_block_size) << 16) |
+         (PackSchurBlockSize(e_block_size) << 8) |
+         PackSchurBlockSize(f_block_size);
+}
+
 CERES_NO_EXPORT
 void GetBestSchurTemplateSpecialization(int* row_block_size,
                                         int* e_block_size,